@@ -1,6 +1,7 @@
 import os
 import logging
 import time
+from collections import deque
 from dotenv import load_dotenv
 import krakenex
 
@@ -15,6 +16,10 @@ kraken = krakenex.API()
 kraken.key = API_KEY
 kraken.secret = API_SECRET
 
+# Bounded cache of recently placed orders (oldest entries are dropped first)
+ORDER_CACHE_SIZE = int(os.getenv('ORDER_CACHE_SIZE', '100'))
+recent_orders = deque(maxlen=ORDER_CACHE_SIZE)
+
 # Set up logging to file
 logging.basicConfig(
     filename='trading_bot.log',
@@ -81,6 +86,7 @@ def place_order(pair, type, ordertype, volume, price=None):
             logging.error(f"Order placement error: {response['error']}")
         else:
             logging.info(f"Order placed successfully: {response['result']}")
+            recent_orders.append(response['result'])
         return response['result']
     return None
 
@@ -1,9 +1,12 @@
 import logging
-from api_connection import place_order, get_balance
+from api_connection import place_order, get_balance, recent_orders
 from src.state_machine import TradingStateMachine
-from src.sma_calculations import fetch_and_calculate_sma
+from src.sma_calculations import fetch_and_calculate_sma, calculate_sma_from_history, fetch_ohlc
 from src.pid_controller import PIDController
-from tensorflow.keras.models import load_model
+from src.portfolio_risk import PortfolioRiskEngine
+from src.price_history import PriceHistory
+from src.model_cache import LOW_MEMORY, get_model, release_model
+from src.memory_report import memory_report, format_memory_report
 
 # Set up logging to file
 logging.basicConfig(
@@ -12,15 +15,12 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-# Load the trained neural network model
-model = load_model("models/price_prediction_model.h5")
-
 # Initialize the state machine and PID controller
 fsm = TradingStateMachine()
 pid = PIDController(kp=0.1, ki=0.01, kd=0.05)
 
 # Function to execute hybrid strategy
-def hybrid_trading_strategy(pair, interval, pid, fsm, model):
+def hybrid_trading_strategy(pair, interval, pid, fsm, model, risk=None, history=None, refresh=True):
     """
     Executes the hybrid trading strategy by combining state machine, PID controller, and SMA logic.
 
@@ -30,9 +30,17 @@ def hybrid_trading_strategy(pair, interval, pid, fsm, model):
         pid (PIDController): Initialized PID controller instance.
         fsm (TradingStateMachine): Initialized state machine instance.
         model: Neural network model for trend prediction.
+        risk (PortfolioRiskEngine, optional): Shared risk engine used to cap orders
+            against total exposure and portfolio volatility. Defaults to None.
+        history (PriceHistory, optional): Compact price buffers kept between cycles. Defaults to None.
+        refresh (bool): Fetch new bars before deciding. Pass False when the caller already
+            refreshed history this cycle (see refresh_market_data). Defaults to True.
     """
     # Step 1: Fetch and calculate SMA
-    result = fetch_and_calculate_sma(pair, interval=interval, count=200)
+    if history is not None and not refresh:
+        result = calculate_sma_from_history(pair, history)
+    else:
+        result = fetch_and_calculate_sma(pair, interval=interval, count=200, history=history)
     if result is None:
         logging.error("Error: Unable to calculate SMA. Skipping this cycle.")
         return
@@ -53,16 +61,86 @@ def hybrid_trading_strategy(pair, interval, pid, fsm, model):
 
     # Step 5: Take action based on state and control signal
     if state == "Buying" and control_signal > 0:
-        logging.info(f"Executing Buy Order for {abs(control_signal)} units.")
+        volume = abs(control_signal)
+        if risk is not None:
+            volume = risk.check_order(pair, "buy", volume, current_price)
+            if volume <= 0:
+                return
+        logging.info(f"Executing Buy Order for {volume} units.")
         # Simulating the buy order (you can use place_order() here for actual trading)
-        print(f"Simulating Buy Order for {abs(control_signal)}")
-        # place_order(pair, "buy", "market", str(abs(control_signal)))
+        print(f"Simulating Buy Order for {volume}")
+        # place_order(pair, "buy", "market", str(volume))
+        if risk is not None:
+            risk.record_fill(pair, "buy", volume, current_price)
 
     elif state == "Selling" and control_signal < 0:
-        logging.info(f"Executing Sell Order for {abs(control_signal)} units.")
+        volume = abs(control_signal)
+        if risk is not None:
+            volume = risk.check_order(pair, "sell", volume, current_price)
+            if volume <= 0:
+                return
+        logging.info(f"Executing Sell Order for {volume} units.")
         # Simulating the sell order (you can use place_order() here for actual trading)
-        print(f"Simulating Sell Order for {abs(control_signal)}")
-        # place_order(pair, "sell", "market", str(abs(control_signal)))
+        print(f"Simulating Sell Order for {volume}")
+        # place_order(pair, "sell", "market", str(volume))
+        if risk is not None:
+            risk.record_fill(pair, "sell", volume, current_price)
+
+def refresh_market_data(history, pairs, interval):
+    """
+    Fetches OHLC bars once per pair and stores them in the shared price history.
+
+    Args:
+        history (PriceHistory): Shared price buffers.
+        pairs (iterable): Trading pairs to refresh.
+        interval (int): Time interval for fetching historical prices (e.g., 1440 for 1 day).
+    """
+    for pair in pairs:
+        result = fetch_ohlc(pair, interval=interval)
+        if result is None:
+            logging.error(f"Error: Unable to fetch prices for {pair}.")
+            continue
+        history.update(pair, *result)
+
+def update_risk(risk, history, assets, quote_asset="ZUSD"):
+    """
+    Feeds completed bars and the account balance into the risk engine.
+
+    The first call seeds the engine with up to a full window of stored bars; later
+    calls only add bars newer than the last one fed in. Kraken's unfinished current
+    bar is skipped until its close is final. Positions are re-synced from the balance
+    on every call; record_fill() only tracks fills made between two calls.
+
+    Args:
+        risk (PortfolioRiskEngine): Shared risk engine.
+        history (PriceHistory): Shared price buffers, refreshed by refresh_market_data().
+        assets (dict): Trading pair -> base asset code in the balance (e.g., {'XXRPZUSD': 'XXRP'}).
+        quote_asset (str): Balance code of the quote currency (default is 'ZUSD').
+    """
+    # Step 1: Group completed bars by timestamp so pairs line up bar by bar
+    bars = {}
+    for pair in assets:
+        final = history.final(pair)
+        times = history.times(pair)[final]
+        closes = history.closes(pair)[final]
+        if risk.last_time is not None:
+            newer = times > risk.last_time
+            times, closes = times[newer], closes[newer]
+        for bar_time, close in zip(times.tolist(), closes.tolist()):
+            bars.setdefault(bar_time, {})[pair] = close
+
+    # One extra bar, because the first bar fed in only records prices
+    for bar_time in sorted(bars)[-(risk.window + 1):]:
+        risk.update(bars[bar_time], time=bar_time)
+
+    # Step 2: Sync positions and equity from the account balance
+    balance = get_balance()
+    if balance is None:
+        logging.error("Error: Unable to fetch balance. Risk engine keeps the previous equity.")
+        return
+    positions = {pair: float(balance.get(asset, 0)) for pair, asset in assets.items()}
+    risk.set_balances(positions, float(balance.get(quote_asset, 0)))
+    logging.debug(f"Risk: {risk}")
 
 def main():
     """
@@ -70,16 +148,30 @@ def main():
     """
     # Trading parameters
     pair = "XXRPZUSD"  # Example trading pair
+    assets = {pair: "XXRP"}  # Traded pairs and the base asset each one holds
     interval = 1440  # Daily interval (1 day)
 
+    # Price history shared by the strategy and the risk engine; only low-memory mode spills to disk
+    history = PriceHistory() if LOW_MEMORY else PriceHistory(spill_dir=None)
+
+    # Risk engine shared by all traded pairs (one year of daily bars)
+    risk = PortfolioRiskEngine(list(assets), window=365)
+
     # Run the strategy in a loop
     import time
     while True:
         try:
-            hybrid_trading_strategy(pair, interval, pid, fsm, model)
+            refresh_market_data(history, assets, interval)
+            update_risk(risk, history, assets)
+            hybrid_trading_strategy(pair, interval, pid, fsm, get_model(), risk=risk,
+                                    history=history, refresh=False)
         except Exception as e:
             logging.error(f"Error: {e}")
-        time.sleep(86400)  # Run once per day
+        if LOW_MEMORY:
+            release_model()  # The model sits idle until the next cycle
+        logging.info(format_memory_report(memory_report(history=history, risk=risk, orders=recent_orders)))
+        # Wake just after the next bar closes so cycles don't drift
+        time.sleep(interval * 60 - time.time() % (interval * 60) + 30)
 
 if __name__ == "__main__":
     main()
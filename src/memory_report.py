@@ -0,0 +1,88 @@
+import os
+import sys
+from collections import deque
+from src.model_cache import model_nbytes
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Estimates the bytes held by a container and everything it references.
+
+    Args:
+        obj: Object to measure (dicts, lists, tuples, sets and deques are walked).
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def process_rss():
+    """
+    Returns the resident set size of this process in bytes.
+
+    Reads /proc/self/statm where available, otherwise falls back to the peak RSS
+    reported by getrusage. Returns 0 if neither is available (e.g., on Windows).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        try:
+            import resource  # Not available on Windows
+        except ImportError:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def memory_report(history=None, risk=None, orders=None):
+    """
+    Builds a memory footprint report broken down by component.
+
+    Args:
+        history (PriceHistory, optional): Price history buffers (market data).
+        risk (PortfolioRiskEngine, optional): Risk engine buffers and matrices (market data).
+        orders (deque, optional): Order cache (e.g., api_connection.recent_orders).
+
+    Returns:
+        dict: Bytes per component ('market_data', 'model_weights', 'order_cache'), their
+            'total', and the process 'rss'. The TensorFlow runtime is only visible in 'rss'.
+    """
+    market_data = 0
+    if history is not None:
+        market_data += history.nbytes()
+    if risk is not None:
+        market_data += risk.nbytes()
+
+    report = {
+        'market_data': market_data,
+        'model_weights': model_nbytes(),
+        'order_cache': deep_sizeof(orders) if orders is not None else 0,
+    }
+    report['total'] = sum(report.values())
+    report['rss'] = process_rss()
+    return report
+
+
+def format_memory_report(report):
+    """
+    Formats a memory report as a single log line in KiB.
+
+    Args:
+        report (dict): Output of memory_report().
+
+    Returns:
+        str: Human-readable summary.
+    """
+    return "Memory (KiB): " + ", ".join(f"{name}={size / 1024:.1f}" for name, size in report.items())
@@ -0,0 +1,154 @@
+import os
+import gc
+import sys
+import logging
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+MODEL_PATH = "models/price_prediction_model.h5"
+WEIGHTS_PATH = "models/price_prediction_weights.npz"
+
+# Low-memory mode: prefer the NumPy copy of the weights and unload the model between cycles
+LOW_MEMORY = os.getenv('LOW_MEMORY_MODE', '0') == '1'
+
+# Activations the NumPy forward pass implements
+SUPPORTED_ACTIVATIONS = ('relu', 'linear')
+
+# Process-wide model shared by every caller of get_model()
+_model = None
+
+
+class NumpyDenseModel:
+    def __init__(self, layers):
+        """
+        Initialize a dense feedforward model evaluated with NumPy only.
+
+        Args:
+            layers (list): (weights, bias, activation) tuples, input layer first.
+        """
+        self.layers = layers
+
+    @classmethod
+    def load(cls, path=WEIGHTS_PATH):
+        """
+        Loads weights exported by export_weights().
+
+        Args:
+            path (str): Path to the .npz weights file.
+
+        Returns:
+            NumpyDenseModel: The loaded model.
+        """
+        with np.load(path) as data:
+            activations = [str(a) for a in data['activations']]
+            layers = []
+            for i, activation in enumerate(activations):
+                if activation not in SUPPORTED_ACTIVATIONS:
+                    raise ValueError(f"Unsupported activation '{activation}' in layer {i} of {path}")
+                if f"W{i}" not in data or f"b{i}" not in data:
+                    raise ValueError(f"Missing weights for layer {i} in {path}")
+                layers.append((data[f"W{i}"], data[f"b{i}"], activation))
+        return cls(layers)
+
+    def predict(self, X, verbose=0):
+        """
+        Runs a forward pass; matches the shape returned by keras Model.predict.
+
+        Args:
+            X (array-like): Input rows of (price, SMA).
+
+        Returns:
+            numpy.ndarray: Predictions with shape (rows, 1).
+        """
+        out = np.asarray(X, dtype=np.float32)
+        for weights, bias, activation in self.layers:
+            out = out @ weights + bias
+            if activation == 'relu':
+                np.maximum(out, 0, out=out)
+        return out
+
+    def nbytes(self):
+        """int: Bytes held by the weights."""
+        return sum(w.nbytes + b.nbytes for w, b, _ in self.layers)
+
+
+def export_weights(model, path=WEIGHTS_PATH):
+    """
+    Saves the dense layer weights of a keras model so it can run without TensorFlow.
+
+    Args:
+        model (keras.Model): Trained Sequential model of Dense layers.
+        path (str): Destination .npz file.
+
+    Raises:
+        ValueError: If a layer is not a Dense layer with weights and bias, or uses an
+            activation the NumPy forward pass does not implement.
+    """
+    arrays = {}
+    activations = []
+    for i, layer in enumerate(model.layers):
+        weights = layer.get_weights()
+        activation = layer.get_config().get('activation')
+        if type(layer).__name__ != 'Dense' or len(weights) != 2:
+            raise ValueError(f"Layer {i} ({layer.name}) is not a Dense layer with weights and bias.")
+        if activation not in SUPPORTED_ACTIVATIONS:
+            raise ValueError(f"Layer {i} ({layer.name}) uses unsupported activation '{activation}'.")
+        arrays[f"W{i}"], arrays[f"b{i}"] = weights
+        activations.append(activation)
+    np.savez(path, activations=np.array(activations), **arrays)
+    logging.info(f"Exported model weights to {path}")
+
+
+def get_model(path=MODEL_PATH):
+    """
+    Returns the shared prediction model, loading it on first use.
+
+    In low-memory mode the NumPy weights file is used when present, so TensorFlow
+    is never imported. Otherwise the keras model is loaded from path.
+
+    Args:
+        path (str): Path to the saved keras model.
+
+    Returns:
+        The loaded model (keras.Model or NumpyDenseModel).
+    """
+    global _model
+    if _model is None:
+        if LOW_MEMORY and os.path.exists(WEIGHTS_PATH):
+            _model = NumpyDenseModel.load(WEIGHTS_PATH)
+            logging.info(f"Loaded NumPy model weights from {WEIGHTS_PATH}")
+        else:
+            from tensorflow.keras.models import load_model
+            _model = load_model(path)
+            logging.info(f"Loaded keras model from {path}")
+    return _model
+
+
+def release_model():
+    """
+    Drops the shared model and frees the keras session if TensorFlow is loaded.
+    """
+    global _model
+    if _model is None:
+        return
+    _model = None
+    if 'tensorflow' in sys.modules:
+        sys.modules['tensorflow'].keras.backend.clear_session()
+    gc.collect()
+    logging.info("Released prediction model.")
+
+
+def model_nbytes():
+    """
+    Returns the bytes held by the loaded model's weights (0 if no model is loaded).
+
+    Only the weights are counted; the TensorFlow runtime shows up in the process RSS.
+    """
+    if _model is None:
+        return 0
+    if isinstance(_model, NumpyDenseModel):
+        return _model.nbytes()
+    return _model.count_params() * 4  # float32 weights; avoids copying them out of TensorFlow
@@ -0,0 +1,294 @@
+import logging
+import numpy as np
+
+
+class PortfolioRiskEngine:
+    def __init__(self, pairs, window=1440, equity=0.0, max_pair_weight=0.2,
+                 max_gross_exposure=1.0, max_portfolio_vol=0.01):
+        """
+        Initialize the portfolio risk engine for a fixed set of trading pairs.
+
+        Returns for every pair are kept in one shared (window x pairs) ring buffer.
+        Running sums and cross-products over that buffer are updated as bars arrive,
+        so the covariance matrix and portfolio volatility cost O(pairs^2) per bar
+        instead of a full recomputation over the window.
+
+        A pair only gets a return when it is priced in both the previous bar and the
+        current one; otherwise it is masked out of that bar. Each covariance entry uses
+        the bars where both pairs were observed.
+
+        Args:
+            pairs (list): Trading pairs tracked by the engine (e.g., ['XXRPZUSD', 'XXBTZUSD']).
+            window (int): Number of bars kept for the rolling covariance (default is 1440).
+            equity (float): Account equity in the quote currency, used to turn positions into weights.
+            max_pair_weight (float): Largest absolute position per pair as a fraction of equity.
+            max_gross_exposure (float): Largest sum of absolute position weights.
+            max_portfolio_vol (float): Largest per-bar portfolio volatility (std of portfolio returns).
+        """
+        self.pairs = list(pairs)
+        self.index = {pair: i for i, pair in enumerate(self.pairs)}
+        self.window = window
+        self.equity = equity
+        self.max_pair_weight = max_pair_weight
+        self.max_gross_exposure = max_gross_exposure
+        self.max_portfolio_vol = max_portfolio_vol
+
+        n = len(self.pairs)
+        self.returns = np.zeros((window, n))  # Shared rolling buffer of log returns (0 where masked)
+        self.observed = np.zeros((window, n), dtype=bool)  # Which returns in the buffer are real
+        self.count = 0  # Number of bars currently in the buffer
+        self._head = 0  # Row that the next bar will overwrite
+        self._bars_since_resync = 0
+        self.last_time = None  # Timestamp of the last bar passed to update()
+
+        # Running sums over the bars where both pairs i and j were observed
+        self._pair_count = np.zeros((n, n))  # Number of such bars
+        self._pair_sum = np.zeros((n, n))  # Sum of pair i's returns
+        self._cross = np.zeros((n, n))  # Sum of return cross-products
+        self._scratch = np.zeros((n, n))  # Preallocated buffer for outer products
+        self.covariance = np.zeros((n, n))
+
+        self.prices = np.full(n, np.nan)  # Latest price per pair
+        self._priced = np.zeros(n, dtype=bool)  # Pairs priced in the last bar
+        self.positions = np.zeros(n)  # Units held per pair
+        self.weights = np.zeros(n)  # Position value / equity
+        self._cov_weights = np.zeros(n)  # covariance @ weights, reused by the pre-trade check
+        self.portfolio_variance = 0.0
+
+    def update(self, prices, time=None):
+        """
+        Add one bar of prices and update the covariance matrix and portfolio volatility.
+
+        Args:
+            prices (dict): Price per pair for this bar (e.g., {'XXRPZUSD': 2.5}). A pair that
+                is missing, or was missing from the previous bar, is masked out of this bar's
+                returns, so a move across a gap is never booked as a single bar.
+            time (int, optional): Bar timestamp, kept in last_time. Defaults to None.
+
+        Returns:
+            float: The updated portfolio volatility.
+        """
+        # Step 1: Build the return row for this bar
+        priced = np.zeros(len(self.pairs), dtype=bool)
+        new_prices = self.prices.copy()
+        for pair, price in prices.items():
+            i = self.index.get(pair)
+            if i is not None and price > 0:
+                new_prices[i] = price
+                priced[i] = True
+        observed = priced & self._priced
+        row = np.zeros(len(self.pairs))
+        row[observed] = np.log(new_prices[observed] / self.prices[observed])
+        self.prices = new_prices
+        self._priced = priced
+        if time is not None:
+            self.last_time = time
+
+        # A bar with no returns (e.g., the first one) only records prices
+        if observed.any():
+            # Step 2: Drop the oldest bar from the running sums once the window is full
+            if self.count == self.window:
+                self._accumulate(self.returns[self._head], self.observed[self._head], -1)
+
+            # Step 3: Add the new bar to the buffer and the running sums
+            self.returns[self._head] = row
+            self.observed[self._head] = observed
+            self._accumulate(row, observed, 1)
+            self._head = (self._head + 1) % self.window
+            self.count = min(self.count + 1, self.window)
+
+            # Rebuild the sums from the buffer once per window to stop floating-point drift
+            self._bars_since_resync += 1
+            if self._bars_since_resync >= self.window:
+                self._resync()
+            self._refresh_covariance()
+
+        self._refresh_weights()
+        return self.portfolio_vol
+
+    def _accumulate(self, row, observed, sign):
+        """Adds (sign=1) or removes (sign=-1) one bar from the running sums."""
+        mask = observed.astype(float)
+        for target, left, right in ((self._cross, row, row),
+                                    (self._pair_sum, row, mask),
+                                    (self._pair_count, mask, mask)):
+            np.outer(left, right, out=self._scratch)
+            if sign > 0:
+                target += self._scratch
+            else:
+                target -= self._scratch
+
+    def _resync(self):
+        """Recompute the running sums from the buffer (amortized O(pairs^2) per bar)."""
+        returns = self.returns[:self.count]
+        mask = self.observed[:self.count].astype(float)
+        self._cross = returns.T @ returns
+        self._pair_sum = returns.T @ mask
+        self._pair_count = mask.T @ mask
+        self._bars_since_resync = 0
+
+    def _refresh_covariance(self):
+        """Derive the pairwise sample covariance matrix from the running sums."""
+        counts = self._pair_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.multiply(self._pair_sum, self._pair_sum.T, out=self._scratch)
+            self._scratch /= counts
+            np.subtract(self._cross, self._scratch, out=self.covariance)
+            self.covariance /= counts - 1
+        self.covariance[counts < 2] = 0.0  # Needs two shared bars
+
+    def _refresh_weights(self):
+        """Recompute position weights and the portfolio variance."""
+        if self.equity > 0:
+            self.weights = np.nan_to_num(self.positions * self.prices) / self.equity
+        else:
+            self.weights.fill(0.0)
+        self._cov_weights = self.covariance @ self.weights
+        self.portfolio_variance = float(self.weights @ self._cov_weights)
+
+    def nbytes(self):
+        """int: Bytes held by the engine's buffers and matrices."""
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
+
+    @property
+    def portfolio_vol(self):
+        """float: Per-bar volatility of the portfolio return."""
+        return float(np.sqrt(max(self.portfolio_variance, 0.0)))
+
+    def correlation(self):
+        """
+        Returns the correlation matrix derived from the current covariance.
+
+        Returns:
+            numpy.ndarray: (pairs x pairs) correlation matrix; pairs with no variance get 0.
+        """
+        std = np.sqrt(np.clip(np.diag(self.covariance), 0.0, None))
+        denom = np.outer(std, std)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where(denom > 0, self.covariance / denom, 0.0)
+        return corr
+
+    def set_equity(self, equity):
+        """
+        Update the account equity used to compute position weights.
+
+        Args:
+            equity (float): Account equity in the quote currency.
+        """
+        self.equity = equity
+        self._refresh_weights()
+
+    def set_balances(self, positions, cash):
+        """
+        Sync positions from the account balance and set equity to cash plus their market value.
+
+        Args:
+            positions (dict): Units held per pair (e.g., {'XXRPZUSD': 50.0}). Tracked pairs
+                missing from the dict are treated as flat.
+            cash (float): Quote currency balance.
+        """
+        self.positions.fill(0.0)
+        for pair, units in positions.items():
+            i = self.index.get(pair)
+            if i is not None:
+                self.positions[i] = units
+        self.equity = cash + float(np.nansum(self.positions * self.prices))
+        self._refresh_weights()
+
+    def check_order(self, pair, type, volume, price=None):
+        """
+        Pre-trade check that caps or scales a proposed order to fit the risk limits.
+
+        The order is first clipped to the per-pair and gross exposure caps, then scaled
+        down so the resulting portfolio volatility stays within max_portfolio_vol. Orders
+        that reduce exposure are never enlarged. Runs in O(pairs).
+
+        Args:
+            pair (str): Trading pair (e.g., 'XXRPZUSD').
+            type (str): Order type ('buy' or 'sell').
+            volume (float): Proposed amount to trade.
+            price (float, optional): Expected fill price. Defaults to the latest bar price.
+
+        Returns:
+            float: The allowed volume (0.0 if the order is rejected).
+        """
+        i = self.index.get(pair)
+        if i is None:
+            logging.warning(f"Risk check rejected order: {pair} is not tracked by the risk engine.")
+            return 0.0
+        if price is None:
+            price = self.prices[i]
+        if self.equity <= 0 or not price or np.isnan(price) or volume <= 0:
+            logging.warning(f"Risk check rejected order for {pair}: no equity or price available.")
+            return 0.0
+
+        sign = 1.0 if type == "buy" else -1.0
+        current = self.weights[i]
+        delta = sign * volume * price / self.equity
+
+        # Step 1: Clip the target weight to the per-pair and gross exposure caps
+        target = float(np.clip(current + delta, -self.max_pair_weight, self.max_pair_weight))
+        other_gross = float(np.abs(self.weights).sum()) - abs(current)
+        gross_room = max(self.max_gross_exposure - other_gross, 0.0)
+        if abs(target) > gross_room:
+            target = float(np.copysign(gross_room, target))
+        allowed = target - current
+        if allowed * delta <= 0:
+            logging.info(f"Risk check rejected {type} order for {pair}: exposure limit reached.")
+            return 0.0
+        if abs(allowed) > abs(delta):
+            allowed = delta  # Reducing orders are kept at the requested size
+
+        # Step 2: Scale the order so portfolio volatility stays within the limit
+        # variance(a) = c + 2*b*a + q*a^2 for a fraction a of the order
+        c = self.portfolio_variance
+        b = self._cov_weights[i] * allowed
+        q = self.covariance[i, i] * allowed * allowed
+        limit = self.max_portfolio_vol ** 2
+        if c + 2 * b + q > limit:
+            if c >= limit:
+                # Already over the limit: only let through orders that lower the variance
+                if c + 2 * b + q >= c:
+                    logging.info(f"Risk check rejected {type} order for {pair}: volatility limit reached.")
+                    return 0.0
+            elif q > 0:
+                scale = (-b + np.sqrt(b * b - q * (c - limit))) / q
+                allowed *= min(max(scale, 0.0), 1.0)
+            else:
+                # Drift left no usable variance for this pair: solve the linear part instead
+                # (c < limit < c + 2*b + q with q <= 0 implies b > 0)
+                allowed *= min((limit - c) / (2 * b), 1.0)
+
+        allowed_volume = abs(allowed) * self.equity / price
+        if allowed_volume < volume:
+            logging.info(f"Risk check scaled {type} order for {pair} from {volume} to {allowed_volume}.")
+        return allowed_volume
+
+    def record_fill(self, pair, type, volume, price=None):
+        """
+        Record an executed order so later checks see the new exposure.
+
+        Args:
+            pair (str): Trading pair (e.g., 'XXRPZUSD').
+            type (str): Order type ('buy' or 'sell').
+            volume (float): Filled amount.
+            price (float, optional): Fill price. Defaults to the latest bar price.
+        """
+        i = self.index[pair]
+        if price is not None and np.isnan(self.prices[i]):
+            self.prices[i] = price
+        sign = 1.0 if type == "buy" else -1.0
+        self.positions[i] += sign * volume
+        if self.equity <= 0 or np.isnan(self.prices[i]):
+            return
+
+        # Only one weight changes, so covariance @ weights is updated in O(pairs)
+        new_weight = self.positions[i] * self.prices[i] / self.equity
+        self._cov_weights += self.covariance[:, i] * (new_weight - self.weights[i])
+        self.weights[i] = new_weight
+        self.portfolio_variance = float(self.weights @ self._cov_weights)
+
+    def __str__(self):
+        """String representation of the portfolio risk state."""
+        return (f"PortfolioRiskEngine(pairs={len(self.pairs)}, bars={self.count}, "
+                f"vol={self.portfolio_vol:.6f}, gross={np.abs(self.weights).sum():.4f})")
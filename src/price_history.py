@@ -0,0 +1,213 @@
+import os
+import logging
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Retention cap (bars kept in memory per pair) and spill directory for older bars
+HISTORY_RETENTION = int(os.getenv('HISTORY_RETENTION', '720'))
+HISTORY_SPILL_DIR = os.getenv('HISTORY_SPILL_DIR', 'data/history')
+
+# On-disk record layout for spilled bars ('final' is False for a close Kraken never confirmed)
+BAR_DTYPE = np.dtype([('time', '<i8'), ('close', '<f8'), ('final', '?')])
+
+
+class PriceHistory:
+    def __init__(self, retention=HISTORY_RETENTION, pair_retention=None, spill_dir=HISTORY_SPILL_DIR):
+        """
+        Initialize compact per-pair price history buffers.
+
+        Closing prices, timestamps and a final flag are kept in fixed-size NumPy buffers
+        (17 bytes per bar) instead of Python lists. When a pair exceeds its retention cap,
+        the oldest bars are appended to a file in spill_dir and dropped from memory.
+
+        Kraken returns the current, unfinished bar as the last row of every fetch. That
+        bar is stored with final=False and becomes final when a later fetch returns it
+        again together with a newer bar. If no fetch ever does (e.g., after an outage),
+        the bar is kept with its partial close and stays flagged.
+
+        Args:
+            retention (int): Default number of bars kept in memory per pair.
+            pair_retention (dict, optional): Per-pair overrides (e.g., {'XXBTZUSD': 1440}).
+            spill_dir (str, optional): Directory for spilled bars. None drops old bars instead.
+        """
+        self.retention = retention
+        self.pair_retention = dict(pair_retention or {})
+        self.spill_dir = spill_dir
+        self._times = {}  # pair -> int64 buffer of bar timestamps
+        self._closes = {}  # pair -> float64 buffer of closing prices
+        self._final = {}  # pair -> bool buffer, False while a close may still change
+        self._sizes = {}  # pair -> number of bars in use
+        self._spilled_until = {}  # pair -> timestamp of the newest spilled bar
+
+    def _allocate(self, pair):
+        """Allocates the buffers for a pair on first use."""
+        cap = self.pair_retention.get(pair, self.retention)
+        self._times[pair] = np.zeros(cap, dtype=np.int64)
+        self._closes[pair] = np.zeros(cap, dtype=np.float64)
+        self._final[pair] = np.zeros(cap, dtype=bool)
+        self._sizes[pair] = 0
+        # Resume after the bars an earlier run already spilled
+        self._spilled_until[pair] = self._last_spilled_time(pair)
+
+    def _last_spilled_time(self, pair):
+        """Reads the timestamp of the last record in the pair's spill file, or None."""
+        if self.spill_dir is None or not os.path.exists(self._spill_path(pair)):
+            return None
+        count = os.path.getsize(self._spill_path(pair)) // BAR_DTYPE.itemsize
+        if count == 0:
+            return None
+        with open(self._spill_path(pair), 'rb') as f:
+            f.seek((count - 1) * BAR_DTYPE.itemsize)
+            last = np.fromfile(f, dtype=BAR_DTYPE, count=1)
+        return int(last['time'][0])
+
+    def update(self, pair, times, closes):
+        """
+        Appends bars newer than the last stored bar, spilling the oldest ones past the cap.
+
+        A bar with the same timestamp as the last stored one replaces its close. The newest
+        bar of each call is treated as Kraken's unfinished current bar.
+
+        Args:
+            pair (str): Trading pair (e.g., 'XXRPZUSD').
+            times (array-like): Bar timestamps in seconds, oldest first.
+            closes (array-like): Closing prices matching times.
+
+        Returns:
+            int: Number of new bars stored.
+        """
+        if pair not in self._sizes:
+            self._allocate(pair)
+        times = np.asarray(times, dtype=np.int64)
+        closes = np.asarray(closes, dtype=np.float64)
+
+        # Skip bars we already hold (Kraken returns overlapping windows on every call)
+        size = self._sizes[pair]
+        if size:
+            last = self._times[pair][size - 1]
+            newer = times >= last
+            times, closes = times[newer], closes[newer]
+            if len(times) and times[0] == last:
+                self._closes[pair][size - 1] = closes[0]
+                # The close is final once the same fetch also returns a newer bar
+                self._final[pair][size - 1] = len(times) > 1
+                times, closes = times[1:], closes[1:]
+        if len(times) == 0:
+            return 0
+        final = np.ones(len(times), dtype=bool)
+        final[-1] = False
+
+        # Make room by spilling the oldest in-memory bars first and shifting the rest down
+        cap = len(self._closes[pair])
+        overflow = min(size + len(times) - cap, size)
+        if overflow > 0:
+            self._spill(pair, self._times[pair][:overflow], self._closes[pair][:overflow],
+                        self._final[pair][:overflow])
+            keep = size - overflow
+            for buf in (self._times[pair], self._closes[pair], self._final[pair]):
+                buf[:keep] = buf[overflow:size]
+            size = keep
+
+        # Then spill the part of the batch that still doesn't fit (only when memory is empty)
+        if len(times) > cap:
+            self._spill(pair, times[:-cap], closes[:-cap], final[:-cap])
+            times, closes, final = times[-cap:], closes[-cap:], final[-cap:]
+
+        self._times[pair][size:size + len(times)] = times
+        self._closes[pair][size:size + len(closes)] = closes
+        self._final[pair][size:size + len(final)] = final
+        self._sizes[pair] = size + len(times)
+        return len(times)
+
+    def _spill(self, pair, times, closes, final):
+        """Appends bars newer than the spill file's last record, or drops them if spilling is disabled."""
+        if self.spill_dir is None:
+            return
+        until = self._spilled_until.get(pair)
+        if until is not None:
+            newer = times > until
+            times, closes, final = times[newer], closes[newer], final[newer]
+        if len(times) == 0:
+            return
+        records = np.empty(len(times), dtype=BAR_DTYPE)
+        records['time'] = times
+        records['close'] = closes
+        records['final'] = final
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self._spill_path(pair), 'ab') as f:
+                records.tofile(f)
+            self._spilled_until[pair] = int(times[-1])
+        except OSError as e:
+            logging.error(f"Failed to spill {len(records)} bars for {pair}: {e}")
+
+    def _spill_path(self, pair):
+        return os.path.join(self.spill_dir, f"{pair}.bin")
+
+    def closes(self, pair):
+        """
+        Returns the in-memory closing prices for a pair (a view, oldest first).
+
+        Args:
+            pair (str): Trading pair (e.g., 'XXRPZUSD').
+
+        Returns:
+            numpy.ndarray: Closing prices, empty if the pair has no history.
+        """
+        if pair not in self._sizes:
+            return np.empty(0, dtype=np.float64)
+        return self._closes[pair][:self._sizes[pair]]
+
+    def times(self, pair):
+        """
+        Returns the in-memory bar timestamps for a pair (a view, oldest first).
+
+        Args:
+            pair (str): Trading pair (e.g., 'XXRPZUSD').
+
+        Returns:
+            numpy.ndarray: Bar timestamps, empty if the pair has no history.
+        """
+        if pair not in self._sizes:
+            return np.empty(0, dtype=np.int64)
+        return self._times[pair][:self._sizes[pair]]
+
+    def final(self, pair):
+        """
+        Returns the in-memory final flags for a pair (a view, oldest first).
+
+        Args:
+            pair (str): Trading pair (e.g., 'XXRPZUSD').
+
+        Returns:
+            numpy.ndarray: True where the close is final, empty if the pair has no history.
+        """
+        if pair not in self._sizes:
+            return np.empty(0, dtype=bool)
+        return self._final[pair][:self._sizes[pair]]
+
+    def load_spilled(self, pair):
+        """
+        Reads the bars spilled to disk for a pair.
+
+        Args:
+            pair (str): Trading pair (e.g., 'XXRPZUSD').
+
+        Returns:
+            numpy.ndarray: Structured array with 'time', 'close' and 'final' fields, oldest first.
+        """
+        if self.spill_dir is None or not os.path.exists(self._spill_path(pair)):
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.fromfile(self._spill_path(pair), dtype=BAR_DTYPE)
+
+    def nbytes(self):
+        """int: Bytes held by the in-memory buffers."""
+        return sum(buf.nbytes for buffers in (self._times, self._closes, self._final)
+                   for buf in buffers.values())
+
+    def __str__(self):
+        """String representation of the history buffers."""
+        return f"PriceHistory(pairs={len(self._sizes)}, bars={sum(self._sizes.values())}, bytes={self.nbytes()})"
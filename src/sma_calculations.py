@@ -1,11 +1,12 @@
 import requests
+import numpy as np
 
 def calculate_sma(prices, window=200):
     """
     Calculates the Simple Moving Average (SMA) for the given prices.
 
     Args:
-        prices (list): List of historical prices.
+        prices (list or numpy.ndarray): Historical prices.
         window (int): The SMA window size (default is 200).
 
     Returns:
@@ -13,11 +14,11 @@ def calculate_sma(prices, window=200):
     """
     if len(prices) < window:
         return None  # Not enough data to calculate SMA
-    return sum(prices[-window:]) / window
+    return float(np.sum(prices[-window:])) / window
 
-def fetch_historical_prices(pair, interval=1440, count=200):
+def fetch_ohlc(pair, interval=1440, count=200):
     """
-    Fetches historical OHLC prices from the Kraken API.
+    Fetches historical OHLC bars from the Kraken API as compact arrays.
 
     Args:
         pair (str): Trading pair (e.g., 'XXRPZUSD').
@@ -25,7 +26,8 @@ def fetch_historical_prices(pair, interval=1440, count=200):
         count (int): Number of data points to fetch.
 
     Returns:
-        list: A list of closing prices, or None if fetching data fails.
+        tuple: Bar timestamps (int64 array) and closing prices (float64 array),
+            or None if fetching data fails.
     """
     url = f"https://api.kraken.com/0/public/OHLC?pair={pair}&interval={interval}&count={count}"
     response = requests.get(url)
@@ -34,9 +36,28 @@ def fetch_historical_prices(pair, interval=1440, count=200):
         print(f"Error fetching data: {data.get('error', [])}")
         return None
     ohlc = data['result'][pair]
-    return [float(row[4]) for row in ohlc]  # Extract closing prices
+    times = np.fromiter((row[0] for row in ohlc), dtype=np.int64, count=len(ohlc))
+    closes = np.fromiter((float(row[4]) for row in ohlc), dtype=np.float64, count=len(ohlc))
+    return times, closes
+
+def fetch_historical_prices(pair, interval=1440, count=200):
+    """
+    Fetches historical OHLC prices from the Kraken API.
+
+    Args:
+        pair (str): Trading pair (e.g., 'XXRPZUSD').
+        interval (int): Time interval for OHLC data (default is 1440 minutes for 1 day).
+        count (int): Number of data points to fetch.
+
+    Returns:
+        numpy.ndarray: Closing prices, or None if fetching data fails.
+    """
+    result = fetch_ohlc(pair, interval=interval, count=count)
+    if result is None:
+        return None
+    return result[1]  # Extract closing prices
 
-def fetch_and_calculate_sma(pair, interval=1440, count=200):
+def fetch_and_calculate_sma(pair, interval=1440, count=200, history=None):
     """
     Fetches historical prices and calculates the SMA.
 
@@ -44,19 +65,50 @@ def fetch_and_calculate_sma(pair, interval=1440, count=200):
         pair (str): Trading pair (e.g., 'XXRPZUSD').
         interval (int): Time interval for OHLC data (default is 1440 minutes for 1 day).
         count (int): Number of data points to fetch.
+        history (PriceHistory, optional): Buffers that keep new bars between calls;
+            the SMA is then calculated over the retained history. Defaults to None.
 
     Returns:
         dict: A dictionary containing the SMA and the latest price, or None if an error occurs.
     """
-    historical_prices = fetch_historical_prices(pair, interval=interval, count=count)
-    if not historical_prices:
+    result = fetch_ohlc(pair, interval=interval, count=count)
+    if result is None:
+        print("Error: Unable to fetch historical prices.")
+        return None
+    if history is not None:
+        history.update(pair, *result)
+        return calculate_sma_from_history(pair, history)
+    historical_prices = result[1]
+    if len(historical_prices) == 0:
         print("Error: Unable to fetch historical prices.")
         return None
     sma = calculate_sma(historical_prices, window=200)
     if sma is None:
         print("Error: Not enough data to calculate SMA.")
         return None
-    return {"sma": sma, "latest_price": historical_prices[-1]}
+    return {"sma": sma, "latest_price": float(historical_prices[-1])}
+
+def calculate_sma_from_history(pair, history, window=200):
+    """
+    Calculates the SMA over bars already stored in a PriceHistory, without fetching.
+
+    Args:
+        pair (str): Trading pair (e.g., 'XXRPZUSD').
+        history (PriceHistory): Buffers holding the pair's recent bars.
+        window (int): The SMA window size (default is 200).
+
+    Returns:
+        dict: A dictionary containing the SMA and the latest price, or None if an error occurs.
+    """
+    historical_prices = history.closes(pair)
+    if len(historical_prices) == 0:
+        print("Error: No stored prices for this pair.")
+        return None
+    sma = calculate_sma(historical_prices, window=window)
+    if sma is None:
+        print("Error: Not enough data to calculate SMA.")
+        return None
+    return {"sma": sma, "latest_price": float(historical_prices[-1])}
 
 
 # TESTING PART
@@ -1,7 +1,7 @@
 import logging
 import numpy as np
-from tensorflow.keras.models import load_model
 from sma_calculations import fetch_and_calculate_sma
+from model_cache import get_model
 import requests
 
 # Set up logging
@@ -11,9 +11,6 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-# Load the trained neural network model
-model = load_model("models/price_prediction_model.h5")
-
 # Function to fetch historical prices and calculate SMA
 def test_model(pair='XXRPZUSD', interval='1440', count=200):
     """
@@ -41,7 +38,7 @@ def test_model(pair='XXRPZUSD', interval='1440', count=200):
 
     # Step 3: Predict the future price
     try:
-        prediction = model.predict(input_data)
+        prediction = get_model().predict(input_data)
         predicted_price = prediction[0][0]
 
         # Log and print the results
@@ -53,4 +50,5 @@ def test_model(pair='XXRPZUSD', interval='1440', count=200):
         print(f"Error during prediction: {e}")
 
 # Run the test
-test_model(pair='XXRPZUSD', interval='1440', count=200)
+if __name__ == "__main__":
+    test_model(pair='XXRPZUSD', interval='1440', count=200)
@@ -1,9 +1,7 @@
 import numpy as np
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense
-from tensorflow.keras.optimizers import Adam
 import requests
 from datetime import datetime
+from model_cache import export_weights
 
 def fetch_historical_prices(pair, interval='1440', count=1000):
     """
@@ -15,7 +13,7 @@ def fetch_historical_prices(pair, interval='1440', count=1000):
         count (int): Number of data points to fetch (default is 1000).
 
     Returns:
-        list: List of closing prices.
+        numpy.ndarray: Closing prices.
     """
     url = f'https://api.kraken.com/0/public/OHLC?pair={pair}&interval={interval}&count={count}'
     response = requests.get(url)
@@ -25,7 +23,7 @@ def fetch_historical_prices(pair, interval='1440', count=1000):
         raise ValueError(f"Error fetching data: {data['error']}")
 
     ohlc_data = data['result'][pair]
-    prices = [float(item[4]) for item in ohlc_data]  # Close prices
+    prices = np.fromiter((float(item[4]) for item in ohlc_data), dtype=np.float64, count=len(ohlc_data))  # Close prices
     return prices
 
 def calculate_sma(prices, window=200):
@@ -75,6 +73,11 @@ def build_model():
     """
     Builds and compiles a simple feedforward neural network.
     """
+    # Import TensorFlow here so fetching and SMA helpers don't pull it into every process
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense
+    from tensorflow.keras.optimizers import Adam
+
     model = Sequential([
         Dense(64, input_dim=2, activation='relu'),  # Input: 2 features (price, SMA)
         Dense(32, activation='relu'),
@@ -98,5 +101,8 @@ def train_and_save_model():
     model.save("models/price_prediction_model.h5")
     print("Model saved to models/price_prediction_model.h5")
 
+    # Save a NumPy copy of the weights for low-memory mode
+    export_weights(model)
+
 if __name__ == "__main__":
     train_and_save_model()
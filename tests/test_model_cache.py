@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from src.model_cache import NumpyDenseModel
+
+
+def save_weights(path, activations):
+    rng = np.random.default_rng(0)
+    sizes = [2, 4, 1]
+    arrays = {}
+    for i in range(len(activations)):
+        arrays[f"W{i}"] = rng.normal(size=(sizes[i], sizes[i + 1])).astype(np.float32)
+        arrays[f"b{i}"] = rng.normal(size=sizes[i + 1]).astype(np.float32)
+    np.savez(path, activations=np.array(activations), **arrays)
+    return arrays
+
+
+def test_load_and_predict(tmp_path):
+    path = tmp_path / "weights.npz"
+    arrays = save_weights(path, ['relu', 'linear'])
+    model = NumpyDenseModel.load(path)
+
+    X = np.array([[2.5, 2.4]], dtype=np.float32)
+    hidden = np.maximum(X @ arrays['W0'] + arrays['b0'], 0)
+    expected = hidden @ arrays['W1'] + arrays['b1']
+    prediction = model.predict([[2.5, 2.4]])
+    assert prediction.shape == (1, 1)
+    assert np.allclose(prediction, expected)
+
+
+def test_load_rejects_unsupported_activation(tmp_path):
+    path = tmp_path / "weights.npz"
+    save_weights(path, ['relu', 'sigmoid'])
+
+    with pytest.raises(ValueError, match="sigmoid"):
+        NumpyDenseModel.load(path)
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from src.portfolio_risk import PortfolioRiskEngine
+
+PAIRS = ['A', 'B', 'C', 'D']
+
+
+def feed_random_bars(engine, bars, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = np.full(len(engine.pairs), 10.0)
+    for _ in range(bars):
+        prices = prices * np.exp(rng.normal(0, 0.01, len(prices)))
+        engine.update(dict(zip(engine.pairs, prices)))
+
+
+def test_covariance_matches_full_recompute_after_wrap():
+    engine = PortfolioRiskEngine(PAIRS, window=30, equity=1000.0)
+    feed_random_bars(engine, 95)  # Wraps the buffer several times, between resyncs
+
+    expected = np.cov(engine.returns, rowvar=False)
+    assert engine.count == 30
+    assert np.allclose(engine.covariance, expected, atol=1e-15)
+
+    engine.set_balances({'A': 10.0, 'B': -5.0}, cash=500.0)
+    weights = engine.weights
+    assert engine.portfolio_vol == pytest.approx(np.sqrt(weights @ expected @ weights))
+
+
+def test_first_bar_only_records_prices():
+    engine = PortfolioRiskEngine(['A', 'B'], window=10)
+    engine.update({'A': 10.0, 'B': 10.0})
+
+    assert engine.count == 0
+    engine.update({'A': 11.0, 'B': 10.0})
+    assert engine.count == 1
+    assert np.allclose(engine.returns[0], [np.log(1.1), 0.0])
+
+
+def test_covariance_matches_full_recompute_before_wrap():
+    engine = PortfolioRiskEngine(PAIRS, window=100)
+    feed_random_bars(engine, 21)
+
+    assert engine.count == 20
+    expected = np.cov(engine.returns[:engine.count], rowvar=False)
+    assert np.allclose(engine.covariance, expected, atol=1e-15)
+
+
+def test_missing_pairs_are_masked():
+    engine = PortfolioRiskEngine(['A', 'B'], window=100)
+    rng = np.random.default_rng(1)
+    a_prices = 10.0 * np.exp(np.cumsum(rng.normal(0, 0.01, 30)))
+    b_prices = 20.0 * np.exp(np.cumsum(rng.normal(0, 0.01, 30)))
+    for t in range(30):
+        bar = {'A': a_prices[t]}
+        if not 10 <= t < 15:  # B is missing for five bars
+            bar['B'] = b_prices[t]
+        engine.update(bar, time=t)
+
+    # No B return for the gap, nor for the first bar back (it only re-seeds the price)
+    observed_b = engine.observed[:engine.count, 1]
+    assert engine.count == 29
+    assert observed_b.sum() == 29 - 6
+    assert engine.last_time == 29
+
+    returns = engine.returns[:engine.count]
+    both = engine.observed[:engine.count].all(axis=1)
+    assert engine.covariance[0, 0] == pytest.approx(np.var(returns[:, 0], ddof=1))
+    assert engine.covariance[1, 1] == pytest.approx(np.var(returns[observed_b, 1], ddof=1))
+    assert engine.covariance[0, 1] == pytest.approx(np.cov(returns[both].T)[0, 1])
+
+
+def test_nbytes_counts_every_buffer():
+    engine = PortfolioRiskEngine(PAIRS, window=10)
+    n = len(PAIRS)
+
+    assert engine.nbytes() >= 10 * n * 8 + 5 * n * n * 8
+
+
+def test_check_order_caps_pair_weight():
+    engine = PortfolioRiskEngine(PAIRS, equity=1000.0, max_pair_weight=0.2)
+    engine.update({pair: 10.0 for pair in PAIRS})
+
+    assert engine.check_order('A', 'buy', 100.0) == pytest.approx(20.0)
+    assert engine.check_order('A', 'sell', 5.0) == pytest.approx(5.0)
+
+
+def test_check_order_caps_gross_exposure():
+    engine = PortfolioRiskEngine(PAIRS, equity=1000.0, max_pair_weight=1.0, max_gross_exposure=0.5)
+    engine.update({pair: 10.0 for pair in PAIRS})
+    engine.record_fill('A', 'buy', 40.0)  # Weight 0.4
+
+    assert engine.check_order('B', 'sell', 30.0) == pytest.approx(10.0)
+
+
+def test_check_order_never_enlarges_reducing_orders():
+    engine = PortfolioRiskEngine(PAIRS, equity=1000.0, max_pair_weight=0.2)
+    engine.update({pair: 10.0 for pair in PAIRS})
+    engine.record_fill('A', 'buy', 50.0)  # Weight 0.5, above the cap
+
+    assert engine.check_order('A', 'sell', 10.0) == pytest.approx(10.0)
+    assert engine.check_order('A', 'buy', 10.0) == 0.0
+
+
+def test_check_order_scales_to_volatility_limit():
+    engine = PortfolioRiskEngine(PAIRS, window=50, equity=1000.0, max_pair_weight=1.0,
+                                 max_portfolio_vol=0.004)
+    feed_random_bars(engine, 60)
+    price = engine.prices[0]
+
+    volume = engine.check_order('A', 'buy', 1000.0 / price)
+    assert 0 < volume < 1000.0 / price
+
+    engine.record_fill('A', 'buy', volume)
+    assert engine.portfolio_vol == pytest.approx(0.004)
+
+
+def test_check_order_handles_non_positive_variance():
+    engine = PortfolioRiskEngine(PAIRS, equity=1000.0, max_pair_weight=1.0)
+    engine.update({pair: 10.0 for pair in PAIRS})
+    engine.record_fill('B', 'buy', 50.0)  # Weight 0.5
+    engine.covariance[:] = [[-1e-12, 1e-4, 0, 0], [1e-4, 1e-4, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]]
+    engine._refresh_weights()  # Variance 2.5e-5; buying 0.1 of A adds 2 * 5e-6
+
+    # The limit sits halfway, so only half of the order fits
+    engine.max_portfolio_vol = np.sqrt(3e-5)
+    assert engine.check_order('A', 'buy', 10.0) == pytest.approx(5.0)
+
+    engine.covariance[0, 1] = engine.covariance[1, 0] = -1e-4
+    engine._refresh_weights()
+    engine.max_portfolio_vol = np.sqrt(1e-5)  # Already over the limit
+    assert engine.check_order('A', 'buy', 10.0) == pytest.approx(10.0)  # Lowers variance
+    assert engine.check_order('A', 'sell', 10.0) == 0.0
+
+
+def test_check_order_rejects_without_equity():
+    engine = PortfolioRiskEngine(PAIRS)
+    engine.update({pair: 10.0 for pair in PAIRS})
+
+    assert engine.check_order('A', 'buy', 1.0) == 0.0
+    assert engine.check_order('Z', 'buy', 1.0) == 0.0
@@ -0,0 +1,84 @@
+import numpy as np
+
+from src.price_history import PriceHistory
+
+
+def test_overlapping_fetch_refreshes_unfinished_bar(tmp_path):
+    history = PriceHistory(retention=5, spill_dir=str(tmp_path))
+    assert history.update('A', [1, 2, 3], [10.0, 11.0, 12.0]) == 3
+
+    # Bar 3 was unfinished; the next fetch overlaps and carries its final close
+    assert history.update('A', [2, 3, 4], [11.0, 13.0, 14.0]) == 1
+    assert list(history.times('A')) == [1, 2, 3, 4]
+    assert list(history.closes('A')) == [10.0, 11.0, 13.0, 14.0]
+    assert history.update('A', [3, 4], [13.0, 14.0]) == 0
+
+
+def test_spill_keeps_time_order(tmp_path):
+    history = PriceHistory(retention=3, spill_dir=str(tmp_path))
+    history.update('A', [1, 2, 3, 4], [1.0, 2.0, 3.0, 4.0])
+    history.update('A', range(4, 17), np.arange(4.0, 17.0))
+
+    assert list(history.times('A')) == [14, 15, 16]
+    spilled = history.load_spilled('A')
+    assert list(spilled['time']) == list(range(1, 14))
+    assert list(spilled['close']) == [float(t) for t in range(1, 14)]
+
+
+def test_unfinished_bar_is_flagged_until_confirmed(tmp_path):
+    history = PriceHistory(retention=5, spill_dir=str(tmp_path))
+    history.update('A', [1, 2], [1.0, 2.0])
+    assert list(history.final('A')) == [True, False]
+
+    # Refreshed without a newer bar: still unfinished
+    history.update('A', [2], [2.2])
+    assert list(history.final('A')) == [True, False]
+
+    # Refreshed together with a newer bar: final
+    history.update('A', [2, 3], [2.4, 3.0])
+    assert list(history.closes('A')) == [1.0, 2.4, 3.0]
+    assert list(history.final('A')) == [True, True, False]
+
+
+def test_unconfirmed_bar_is_kept_and_flagged_on_both_spill_paths(tmp_path):
+    # Spilled while other bars stay in memory
+    partial = PriceHistory(retention=3, spill_dir=str(tmp_path / 'partial'))
+    partial.update('A', [1, 2], [1.0, 2.5])
+    partial.update('A', [3, 4], [3.0, 4.0])  # Skips bar 2, so its close stays partial
+    partial.update('A', [5, 6], [5.0, 6.0])
+    spilled = partial.load_spilled('A')
+    assert list(spilled['time']) == [1, 2, 3]
+    assert list(spilled['close']) == [1.0, 2.5, 3.0]
+    assert list(spilled['final']) == [True, False, True]
+
+    # Spilled together with every other in-memory bar
+    full = PriceHistory(retention=2, spill_dir=str(tmp_path / 'full'))
+    full.update('A', [1, 2], [1.0, 2.5])
+    full.update('A', [3, 4, 5], [3.0, 4.0, 5.0])
+    spilled = full.load_spilled('A')
+    assert list(spilled['time']) == [1, 2, 3]
+    assert list(spilled['final']) == [True, False, True]
+    assert list(full.times('A')) == [4, 5]
+
+
+def test_restart_does_not_spill_bars_twice(tmp_path):
+    first = PriceHistory(retention=3, spill_dir=str(tmp_path))
+    first.update('A', [1, 2, 3, 4, 5], [1.0, 2.0, 3.0, 4.0, 5.0])
+    assert list(first.load_spilled('A')['time']) == [1, 2]
+
+    # A new process fetches an overlapping window from scratch
+    second = PriceHistory(retention=3, spill_dir=str(tmp_path))
+    second.update('A', [2, 3, 4, 5, 6], [2.0, 3.0, 4.0, 5.0, 6.0])
+    assert list(second.load_spilled('A')['time']) == [1, 2, 3]
+    assert list(second.times('A')) == [4, 5, 6]
+
+
+def test_pair_retention_and_memory_size():
+    history = PriceHistory(retention=4, pair_retention={'B': 2}, spill_dir=None)
+    history.update('A', range(10), np.arange(10.0))
+    history.update('B', range(10), np.arange(10.0))
+
+    assert len(history.closes('A')) == 4
+    assert list(history.closes('B')) == [8.0, 9.0]
+    assert history.nbytes() == (4 + 2) * 17
+    assert len(history.load_spilled('A')) == 0